@@ -1,5 +1,8 @@
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+import fnmatch
+import functools
 import glob
 import logging
 import os
@@ -24,6 +27,22 @@ def project_to_short_name(treebank):
     else:
         return treebank_to_short_name(treebank)
 
+@functools.lru_cache(maxsize=None)
+def _list_treebank_dir(udbase_dir, treebank):
+    """
+    Returns the sorted filenames in a treebank directory, or () if the directory does not exist
+
+    Preparing a treebank looks up several files in the same directory,
+    so the listing is cached.  The UD directories are only ever read
+    by these scripts, but _list_treebank_dir.cache_clear() can be used
+    if they change while running.
+    """
+    treebank_dir = f"{udbase_dir}/{treebank}"
+    if not os.path.isdir(treebank_dir):
+        return ()
+    # hidden files are skipped, as glob does
+    return tuple(sorted(x for x in os.listdir(treebank_dir) if not x.startswith(".")))
+
 def find_treebank_dataset_file(treebank, udbase_dir, dataset, extension, fail=False):
     """
     For a given treebank, dataset, extension, look for the exact filename to use.
@@ -37,7 +56,8 @@ def find_treebank_dataset_file(treebank, udbase_dir, dataset, extension, fail=Fa
     if treebank.startswith("UD_Korean") and treebank.endswith("_seg"):
         treebank = treebank[:-4]
     filename = f"{udbase_dir}/{treebank}/*-ud-{dataset}.{extension}"
-    files = glob.glob(filename)
+    files = fnmatch.filter(_list_treebank_dir(udbase_dir, treebank), f"*-ud-{dataset}.{extension}")
+    files = [f"{udbase_dir}/{treebank}/{x}" for x in files]
     if len(files) == 0:
         if fail:
             raise FileNotFoundError("Could not find any treebank files which matched {}".format(filename))
@@ -109,6 +129,8 @@ def get_ud_treebanks(udbase_dir, filtered=True):
 def build_argparse():
     parser = argparse.ArgumentParser()
     parser.add_argument('treebanks', type=str, nargs='+', help='Which treebanks to run on.  Use all_ud or ud_all for all UD treebanks')
+    parser.add_argument('--num_processes', type=int, default=1,
+                        help='How many treebanks to process at once, such as when using ud_all.  Defaults to 1, as some of the scripts run models which may not fit on the GPU more than once')
     return parser
 
 
@@ -130,6 +152,12 @@ def main(process_treebank, add_specific_args=None):
         else:
             treebanks.append(treebank)
 
-    for treebank in treebanks:
-        process_treebank(treebank, paths, args)
+    if args.num_processes > 1 and len(treebanks) > 1:
+        with ProcessPoolExecutor(max_workers=args.num_processes) as executor:
+            futures = [executor.submit(process_treebank, treebank, paths, args) for treebank in treebanks]
+            for future in futures:
+                future.result()
+    else:
+        for treebank in treebanks:
+            process_treebank(treebank, paths, args)
 
@@ -0,0 +1,157 @@
+"""
+Extracts raw text from conllu data.  Uses newdoc and newpar tags when available.
+
+This is a port of conllu_to_text.pl (Copyright 2017 Dan Zeman) from
+the UD tools, run in-process so that preparing a dataset does not
+need to start perl for every file.  The output matches the perl
+script.  Only the default formatting is ported: the Chinese / Japanese
+line breaking behind the perl script's --language flag was never used
+when preparing the tokenizer data.
+
+For example
+  python -m stanza.utils.datasets.conllu_to_text en_ewt.train.gold.conllu -o en_ewt.train.txt
+"""
+
+import argparse
+import re
+import sys
+
+TEXT_RE = re.compile(r"^#\s*text\s*=\s*(.+)")
+NEWPAR_RE = re.compile(r"^#\s*newpar(\s|$)", re.IGNORECASE)
+NEWDOC_RE = re.compile(r"^#\s*newdoc(\s|$)", re.IGNORECASE)
+MWT_LINE_RE = re.compile(r"^\d+-(\d+)\t")
+WORD_LINE_RE = re.compile(r"^(\d+)\t")
+NEWPAR_YES_RE = re.compile("NewPar=Yes", re.IGNORECASE)
+
+# line breaks are put at word boundaries after at most this many characters
+LINE_LIMIT = 80
+
+def write_lines_from_buffer(buffer, fout, limit=LINE_LIMIT):
+    """
+    Writes as many complete lines of text as there are in the buffer.
+
+    Returns the remaining contents of the buffer.  If there is a word
+    longer than the limit, it will be written on one line.
+    """
+    while len(buffer) >= limit:
+        last_space = None
+        for idx, char in enumerate(buffer):
+            if idx > limit and last_space is not None:
+                break
+            if char.isspace():
+                last_space = idx
+        if last_space is not None and last_space > 0:
+            fout.write(buffer[:last_space])
+            fout.write("\n")
+            buffer = buffer[last_space+1:]
+        else:
+            fout.write(buffer)
+            fout.write("\n")
+            buffer = ""
+    return buffer
+
+def write_new_paragraph_if_needed(start, newdoc, newpar, buffer, fout):
+    """
+    Writes an extra line to separate paragraphs if necessary.  Returns the updated buffer.
+    """
+    if not start and (newdoc or newpar):
+        if buffer:
+            fout.write(buffer)
+            fout.write("\n")
+            buffer = ""
+        fout.write("\n")
+    return buffer
+
+def conllu_to_text(sents, fout):
+    """
+    Writes the raw text of the given sentences to fout
+
+    sents is an iterable of sentences, each of which is a list of
+    conllu lines, such as the output of read_sentences_from_conllu
+    """
+    ftext = ""     # from the word forms of the tokens
+    newpar = False
+    newdoc = False
+    buffer = ""
+    start = True
+    mwt_last = None
+
+    def end_paragraph_in_sentence():
+        # Paragraphs may start in the middle of a sentence (bulleted
+        # lists, verse etc.)  The first token of the new paragraph has
+        # NewPar=Yes in the MISC column.  Multi-word tokens have this
+        # in the token-introducing line.
+        nonlocal ftext, newpar, newdoc, buffer, start
+        buffer = write_new_paragraph_if_needed(start, newdoc, newpar, buffer, fout)
+        buffer = write_lines_from_buffer(buffer + ftext, fout)
+        fout.write(buffer)
+        fout.write("\n\n")
+        buffer = ""
+        start = False
+        newdoc = False
+        newpar = False
+        ftext = ""
+
+    for sentence in sents:
+        for line in sentence:
+            if TEXT_RE.match(line):
+                # the text attribute is not used: if there have been
+                # intra-sentential paragraph breaks, it does not match
+                # the text accumulated in ftext
+                continue
+            if NEWPAR_RE.match(line):
+                newpar = True
+                continue
+            if NEWDOC_RE.match(line):
+                newdoc = True
+                continue
+
+            match = MWT_LINE_RE.match(line)
+            if match:
+                mwt_last = int(match.group(1))
+            else:
+                match = WORD_LINE_RE.match(line)
+                if not match or (mwt_last is not None and int(match.group(1)) <= mwt_last):
+                    continue
+                mwt_last = None
+
+            pieces = line.split("\t")
+            misc = pieces[9] if len(pieces) > 9 else ""
+            if NEWPAR_YES_RE.search(misc):
+                end_paragraph_in_sentence()
+            ftext += pieces[1]
+            if misc.find("SpaceAfter=No") < 0:
+                ftext += " "
+
+        # end of the sentence
+        buffer = write_new_paragraph_if_needed(start, newdoc, newpar, buffer, fout)
+        buffer = write_lines_from_buffer(buffer + ftext, fout)
+        start = False
+        newdoc = False
+        newpar = False
+        ftext = ""
+        mwt_last = None
+
+    # There may be unflushed buffer contents after the last sentence,
+    # shorter than the line limit, so just flush it.
+    if buffer:
+        fout.write(buffer)
+        fout.write("\n")
+
+def main(args=None):
+    # imported here to avoid a circular import with prepare_tokenizer_treebank
+    from stanza.utils.datasets.prepare_tokenizer_treebank import read_sentences_from_conllu
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('conllu_file', type=str, help="CoNLL-U file to extract the text from")
+    parser.add_argument('-o', '--output', default=None, type=str, help="Output file name; output to the console if not specified (the default)")
+    args = parser.parse_args(args=args)
+
+    if args.output is None:
+        conllu_to_text(read_sentences_from_conllu(args.conllu_file), sys.stdout)
+    else:
+        with open(args.output, 'w') as fout:
+            conllu_to_text(read_sentences_from_conllu(args.conllu_file), fout)
+
+if __name__ == '__main__':
+    main()
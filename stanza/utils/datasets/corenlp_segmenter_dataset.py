@@ -8,6 +8,7 @@ such as
 """
 
 import argparse
+import itertools
 import os
 import sys
 import tempfile
@@ -61,7 +62,7 @@ def process_treebank(treebank, paths, output_dir):
         train_out = os.path.join(output_dir, f"{short_name}.train.seg.txt")
         test_out = os.path.join(output_dir, f"{short_name}.test.seg.txt")
 
-        write_segmenter_file(train_out, train_set + dev_set)
+        write_segmenter_file(train_out, itertools.chain(train_set, dev_set))
         write_segmenter_file(test_out, test_set)
 
 def main():
@@ -42,32 +42,39 @@ def para_to_chunks(text, char_level_pred):
 def paras_to_chunks(text, char_level_pred):
     return [para_to_chunks(re.sub(r'\s', ' ', pt.rstrip()), pc) for pt, pc in zip(text.split('\n\n'), char_level_pred.split('\n\n'))]
 
-def main(args):
-    parser = argparse.ArgumentParser()
-
-    parser.add_argument('plaintext_file', type=str, help="Plaintext file containing the raw input")
-    parser.add_argument('--char_level_pred', type=str, default=None, help="Plaintext file containing character-level predictions")
-    parser.add_argument('-o', '--output', default=None, type=str, help="Output file name; output to the console if not specified (the default)")
-
-    args = parser.parse_args(args=args)
-
-    with open(args.plaintext_file, 'r') as f:
+def process(plaintext_file, char_level_pred_file=None, output_file=None):
+    """
+    Writes the chunks of the given text, labeled with the character-level predictions, as json
+    """
+    with open(plaintext_file, 'r') as f:
         text = ''.join(f.readlines()).rstrip()
         text = '\n\n'.join([x for x in text.split('\n\n')])
 
-    if args.char_level_pred is not None:
-        with open(args.char_level_pred, 'r') as f:
+    if char_level_pred_file is not None:
+        with open(char_level_pred_file, 'r') as f:
             char_level_pred = ''.join(f.readlines())
     else:
         char_level_pred = '\n\n'.join(['0' * len(x) for x in text.split('\n\n')])
 
     assert len(text) == len(char_level_pred), 'Text has {} characters but there are {} char-level labels!'.format(len(text), len(char_level_pred))
 
-    output = sys.stdout if args.output is None else open(args.output, 'w')
+    output = sys.stdout if output_file is None else open(output_file, 'w')
 
     json.dump(paras_to_chunks(text, char_level_pred), output)
 
-    output.close()
+    if output is not sys.stdout:
+        output.close()
+
+def main(args):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('plaintext_file', type=str, help="Plaintext file containing the raw input")
+    parser.add_argument('--char_level_pred', type=str, default=None, help="Plaintext file containing character-level predictions")
+    parser.add_argument('-o', '--output', default=None, type=str, help="Output file name; output to the console if not specified (the default)")
+
+    args = parser.parse_args(args=args)
+
+    process(args.plaintext_file, args.char_level_pred, args.output)
 
 if __name__ == '__main__':
     main(sys.argv[1:])
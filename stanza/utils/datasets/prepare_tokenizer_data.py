@@ -56,31 +56,25 @@ def find_next_word(index, text, word, output):
         index += 1
     return index, word_sofar
 
-def main(args):
-    parser = argparse.ArgumentParser()
-
-    parser.add_argument('plaintext_file', type=str, help="Plaintext file containing the raw input")
-    parser.add_argument('conllu_file', type=str, help="CoNLL-U file containing tokens and sentence breaks")
-    parser.add_argument('-o', '--output', default=None, type=str, help="Output file name; output to the console if not specified (the default)")
-    parser.add_argument('-m', '--mwt_output', default=None, type=str, help="Output file name for MWT expansions; output to the console if not specified (the default)")
-
-    args = parser.parse_args(args=args)
-
-    with open(args.plaintext_file, 'r') as f:
+def process(plaintext_file, conllu_file, output_file=None, mwt_output_file=None):
+    """
+    Writes the character labels and MWT expansions for the given text and conllu files
+    """
+    with open(plaintext_file, 'r') as f:
         text = ''.join(f.readlines())
     textlen = len(text)
 
-    if args.output is None:
+    if output_file is None:
         output = sys.stdout
     else:
-        outdir = os.path.split(args.output)[0]
+        outdir = os.path.split(output_file)[0]
         os.makedirs(outdir, exist_ok=True)
-        output = open(args.output, 'w')
+        output = open(output_file, 'w')
 
     index = 0 # character offset in rawtext
 
     mwt_expansions = []
-    with open(args.conllu_file, 'r') as f:
+    with open(conllu_file, 'r') as f:
         buf = ''
         mwtbegin = 0
         mwtend = -1
@@ -133,16 +127,29 @@ def main(args):
 
                 last_comments = ''
 
-    output.close()
+    if output is not sys.stdout:
+        output.close()
 
     mwts = Counter(mwt_expansions)
-    if args.mwt_output is None:
+    if mwt_output_file is None:
         print('MWTs:', mwts)
     else:
-        with open(args.mwt_output, 'w') as f:
+        with open(mwt_output_file, 'w') as f:
             json.dump(list(mwts.items()), f)
 
         print('{} unique MWTs found in data'.format(len(mwts)))
 
+def main(args):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('plaintext_file', type=str, help="Plaintext file containing the raw input")
+    parser.add_argument('conllu_file', type=str, help="CoNLL-U file containing tokens and sentence breaks")
+    parser.add_argument('-o', '--output', default=None, type=str, help="Output file name; output to the console if not specified (the default)")
+    parser.add_argument('-m', '--mwt_output', default=None, type=str, help="Output file name for MWT expansions; output to the console if not specified (the default)")
+
+    args = parser.parse_args(args=args)
+
+    process(args.plaintext_file, args.conllu_file, args.output, args.mwt_output)
+
 if __name__ == '__main__':
     main(sys.argv[1:])
@@ -22,20 +22,20 @@ There are a few special case handlings of treebanks in this file:
 """
 
 import argparse
-import glob
+from concurrent.futures import ProcessPoolExecutor
+import itertools
 import os
 import random
 import re
 import shutil
-import subprocess
 import tempfile
 
 import stanza.utils.datasets.common as common
-import stanza.utils.datasets.postprocess_vietnamese_tokenizer_data as postprocess_vietnamese_tokenizer_data
+import stanza.utils.datasets.conllu_to_text as conllu_to_text
 import stanza.utils.datasets.prepare_tokenizer_data as prepare_tokenizer_data
-import stanza.utils.datasets.preprocess_ssj_data as preprocess_ssj_data
 
-CONLLU_TO_TXT_PERL = os.path.join(os.path.split(__file__)[0], "conllu_to_text.pl")
+# treebanks can be hundreds of MB, so read and write them in large chunks
+IO_BUFFER_SIZE = 1 << 20
 
 
 def copy_conllu_file(tokenizer_dir, tokenizer_file, dest_dir, dest_file, short_name):
@@ -78,57 +78,121 @@ def copy_conllu_treebank(treebank, paths, dest_dir, postprocess=None):
         copy_conllu_file(dest_dir, "test.gold", dest_dir, "test.in", short_name)
 
 def read_sentences_from_conllu(filename):
-    sents = []
+    """
+    Yields the sentences of a conllu file one at a time
+
+    Each sentence is a list of the stripped lines of that sentence.
+    Use list() on the result if all of the sentences are needed at once.
+    """
     cache = []
-    with open(filename) as infile:
+    with open(filename, buffering=IO_BUFFER_SIZE) as infile:
         for line in infile:
             line = line.strip()
             if len(line) == 0:
                 if len(cache) > 0:
-                    sents += [cache]
+                    yield cache
                     cache = []
                 continue
-            cache += [line]
+            cache.append(line)
         if len(cache) > 0:
-            sents += [cache]
-    return sents
+            yield cache
+
+def remove_stale_output(filename):
+    """
+    Removes filename if it exists, including if it is a dangling link
+
+    A previous run may have hardlinked a UD file to this path with
+    fast_copy.  Removing the link first means the new output is a new
+    file, rather than overwriting the original treebank through the link.
+    """
+    if os.path.lexists(filename):
+        os.remove(filename)
+
+def open_output_file(filename):
+    """
+    Opens a dataset file in the tokenizer dir for writing, see remove_stale_output
+
+    All of the writers in this module should go through here
+    """
+    remove_stale_output(filename)
+    return open(filename, 'w', buffering=IO_BUFFER_SIZE)
 
 def write_sentences_to_conllu(filename, sents):
-    with open(filename, 'w') as outfile:
+    """
+    Writes an iterable of sentences, each a list of lines, to a conllu file
+
+    Each sentence is written with one call.  The large file buffer
+    batches the actual writes, and only one sentence is held at a time.
+    """
+    with open_output_file(filename) as outfile:
         for lines in sents:
-            for line in lines:
-                print(line, file=outfile)
-            print("", file=outfile)
+            outfile.write("\n".join(lines) + "\n\n")
+
+def write_sentences_to_txt(filename, sents):
+    """
+    Writes the raw text of an iterable of sentences, using conllu_to_text
+    """
+    with open_output_file(filename) as outfile:
+        conllu_to_text.conllu_to_text(sents, outfile)
 
 def convert_conllu_to_txt(conllu, txt):
-    # use an external script to produce the txt files
-    subprocess.check_output(f"perl {CONLLU_TO_TXT_PERL} {conllu} > {txt}", shell=True)
+    write_sentences_to_txt(txt, read_sentences_from_conllu(conllu))
+
+def write_sentences_to_conllu_and_txt(conllu_filename, txt_filename, sents):
+    """
+    Writes both the conllu and the raw text of an iterable of sentences in one pass
+
+    Each sentence is written to the conllu file as it is passed to
+    conllu_to_text, so sents can be a stream which is only read once
+    """
+    with open_output_file(conllu_filename) as conllu_file, \
+         open_output_file(txt_filename) as txt_file:
+        def conllu_sentences():
+            for sentence in sents:
+                conllu_file.write("\n".join(sentence) + "\n\n")
+                yield sentence
+        conllu_to_text.conllu_to_text(conllu_sentences(), txt_file)
 
 def split_train_file(treebank, train_input_conllu,
                      train_output_conllu, train_output_txt,
                      dev_output_conllu, dev_output_txt):
-    # set the seed for each data file so that the results are the same
-    # regardless of how many treebanks are processed at once
-    random.seed(1234)
+    """
+    Randomly splits the sentences of a train file into train and dev
+
+    Rather than reading and shuffling the whole treebank, the
+    sentences are counted first, the dev sentences are chosen by
+    index, and then a second pass streams each sentence to the train
+    or dev conllu.  The train text is converted as the sentences go
+    by, and the dev text is converted from the much smaller dev conllu
+    afterwards.  Sentences stay in their original order within each split.
+    """
+    # use a separately seeded generator for each data file so that the
+    # results are the same regardless of how many treebanks are
+    # processed at once, without changing the global random state
+    rng = random.Random(1234)
 
-    # read and shuffle conllu data
-    sents = read_sentences_from_conllu(train_input_conllu)
-    random.shuffle(sents)
-    n_dev = int(len(sents) * XV_RATIO)
+    n_sents = sum(1 for _ in read_sentences_from_conllu(train_input_conllu))
+    n_dev = int(n_sents * XV_RATIO)
     assert n_dev >= 1, "Dev sentence number less than one."
-    n_train = len(sents) - n_dev
+    n_train = n_sents - n_dev
 
     # split conllu data
-    dev_sents = sents[:n_dev]
-    train_sents = sents[n_dev:]
+    dev_indices = set(rng.sample(range(n_sents), n_dev))
     print("Train/dev split not present.  Randomly splitting train file")
-    print(f"{len(sents)} total sentences found: {n_train} in train, {n_dev} in dev.")
+    print(f"{n_sents} total sentences found: {n_train} in train, {n_dev} in dev.")
+
+    with open_output_file(train_output_conllu) as train_conllu, \
+         open_output_file(dev_output_conllu) as dev_conllu, \
+         open_output_file(train_output_txt) as train_txt:
+        def train_sentences():
+            for idx, sentence in enumerate(read_sentences_from_conllu(train_input_conllu)):
+                if idx in dev_indices:
+                    dev_conllu.write("\n".join(sentence) + "\n\n")
+                else:
+                    train_conllu.write("\n".join(sentence) + "\n\n")
+                    yield sentence
+        conllu_to_text.conllu_to_text(train_sentences(), train_txt)
 
-    # write conllu
-    write_sentences_to_conllu(train_output_conllu, train_sents)
-    write_sentences_to_conllu(dev_output_conllu, dev_sents)
-
-    convert_conllu_to_txt(train_output_conllu, train_output_txt)
     convert_conllu_to_txt(dev_output_conllu, dev_output_txt)
 
     return True
@@ -137,29 +201,32 @@ def mwt_name(base_dir, short_name, dataset):
     return f"{base_dir}/{short_name}-ud-{dataset}-mwt.json"
 
 def prepare_dataset_labels(input_txt, input_conllu, tokenizer_dir, short_name, short_language, dataset):
-    prepare_tokenizer_data.main([input_txt,
-                                 input_conllu,
-                                 "-o", f"{tokenizer_dir}/{short_name}-ud-{dataset}.toklabels",
-                                 "-m", mwt_name(tokenizer_dir, short_name, dataset)])
+    prepare_tokenizer_data.process(input_txt,
+                                   input_conllu,
+                                   f"{tokenizer_dir}/{short_name}-ud-{dataset}.toklabels",
+                                   mwt_name(tokenizer_dir, short_name, dataset))
 
     if short_language == "vi":
-        postprocess_vietnamese_tokenizer_data.main([input_txt,
-                                                    "--char_level_pred", f"{tokenizer_dir}/{short_name}-ud-{dataset}.toklabels",
-                                                    "-o", f"{tokenizer_dir}/{short_name}-ud-{dataset}.json"])
+        import stanza.utils.datasets.postprocess_vietnamese_tokenizer_data as postprocess_vietnamese_tokenizer_data
+        postprocess_vietnamese_tokenizer_data.process(input_txt,
+                                                      f"{tokenizer_dir}/{short_name}-ud-{dataset}.toklabels",
+                                                      f"{tokenizer_dir}/{short_name}-ud-{dataset}.json")
 
-MWT_RE = re.compile("^[0-9]+[-][0-9]+")
+# matches lines which start an MWT range such as 3-4.  the bound match
+# method is kept so the per-line filters skip the attribute lookup
+MWT_MATCH = re.compile("^[0-9]+-[0-9]").match
 
 def strip_mwt_from_sentences(sents):
     """
     Removes all mwt lines from the given list of sentences
 
     Useful for mixing MWT and non-MWT treebanks together (especially English)
+
+    This is lazy, so the output of read_sentences_from_conllu can be
+    filtered as it is streamed to write_sentences_to_conllu
     """
-    new_sents = []
     for sentence in sents:
-        new_sentence = [line for line in sentence if not MWT_RE.match(line)]
-        new_sents.append(new_sentence)
-    return new_sents
+        yield [line for line in sentence if not MWT_MATCH(line)]
 
 
 def augment_arabic_padt(sents):
@@ -364,8 +431,9 @@ def fix_spanish_ancora(input_conllu, output_conllu, output_txt, augment):
     else:
         extra_sentences = []
 
-    write_sentences_to_conllu(output_conllu, new_sentences + extra_sentences)
-    convert_conllu_to_txt(output_conllu, output_txt)
+    new_sentences = new_sentences + extra_sentences
+    write_sentences_to_conllu(output_conllu, new_sentences)
+    write_sentences_to_txt(output_txt, new_sentences)
 
 
 def write_augmented_dataset(input_conllu, output_conllu, output_txt, augment_function):
@@ -373,14 +441,15 @@ def write_augmented_dataset(input_conllu, output_conllu, output_txt, augment_fun
     # regardless of how many treebanks are processed at once
     random.seed(1234)
 
-    # read and shuffle conllu data
-    sents = read_sentences_from_conllu(input_conllu)
+    # read conllu data
+    sents = list(read_sentences_from_conllu(input_conllu))
 
     # the actual meat of the function - produce new sentences
     new_sents = augment_function(sents)
 
-    write_sentences_to_conllu(output_conllu, sents + new_sents)
-    convert_conllu_to_txt(output_conllu, output_txt)
+    sents = sents + new_sents
+    write_sentences_to_conllu(output_conllu, sents)
+    write_sentences_to_txt(output_txt, sents)
 
 def remove_spaces_from_sentences(sents):
     """
@@ -418,7 +487,7 @@ def remove_spaces(input_conllu, output_conllu, output_txt):
     new_sents = remove_spaces_from_sentences(sents)
 
     write_sentences_to_conllu(output_conllu, new_sents)
-    convert_conllu_to_txt(output_conllu, output_txt)
+    write_sentences_to_txt(output_txt, new_sents)
 
 
 def build_combined_korean_dataset(udbase_dir, tokenizer_dir, short_name, dataset, output_txt, output_conllu, prepare_labels=True):
@@ -432,14 +501,14 @@ def build_combined_korean_dataset(udbase_dir, tokenizer_dir, short_name, dataset
     """
     gsd_conllu = common.find_treebank_dataset_file("UD_Korean-GSD", udbase_dir, dataset, "conllu")
     kaist_conllu = common.find_treebank_dataset_file("UD_Korean-Kaist", udbase_dir, dataset, "conllu")
-    sents = read_sentences_from_conllu(gsd_conllu) + read_sentences_from_conllu(kaist_conllu)
+    sents = list(read_sentences_from_conllu(gsd_conllu)) + list(read_sentences_from_conllu(kaist_conllu))
 
     segmenter = short_name.endswith("_seg")
     if segmenter:
         sents = remove_spaces_from_sentences(sents)
 
     write_sentences_to_conllu(output_conllu, sents)
-    convert_conllu_to_txt(output_conllu, output_txt)
+    write_sentences_to_txt(output_txt, sents)
 
     if prepare_labels:
         prepare_dataset_labels(output_txt, output_conllu, tokenizer_dir, short_name, "ko", dataset)
@@ -470,18 +539,18 @@ def build_combined_italian_dataset(udbase_dir, tokenizer_dir, extern_dir, short_
         extra_italian = os.path.join(extern_dir, "italian", "italian.mwt")
         if not os.path.exists(extra_italian):
             raise FileNotFoundError("Cannot find the extra dataset 'italian.mwt' which includes various multi-words retokenized, expected {}".format(extra_italian))
-        extra_sents = read_sentences_from_conllu(extra_italian)
+        extra_sents = list(read_sentences_from_conllu(extra_italian))
         for sentence in extra_sents:
-            if not sentence[2].endswith("_") or not MWT_RE.match(sentence[2]):
+            if not sentence[2].endswith("_") or not MWT_MATCH(sentence[2]):
                 raise AssertionError("Unexpected format of the italian.mwt file.  Has it already be modified to have SpaceAfter=No everywhere?")
             sentence[2] = sentence[2][:-1] + "SpaceAfter=No"
         sents = sents + extra_sents
     else:
         istd_conllu = common.find_treebank_dataset_file("UD_Italian-ISDT", udbase_dir, dataset, "conllu")
-        sents = read_sentences_from_conllu(istd_conllu)
+        sents = list(read_sentences_from_conllu(istd_conllu))
 
     write_sentences_to_conllu(output_conllu, sents)
-    convert_conllu_to_txt(output_conllu, output_txt)
+    write_sentences_to_txt(output_txt, sents)
 
     if prepare_labels:
         prepare_dataset_labels(output_txt, output_conllu, tokenizer_dir, short_name, "it", dataset)
@@ -500,17 +569,17 @@ def build_combined_english_dataset(udbase_dir, tokenizer_dir, extern_dir, short_
         #  UD_English-ParTUT, UD_English-Pronouns, UD_English-Pronouns - xpos are different
         # also include "external" treebanks such as PTB
         treebanks = ["UD_English-EWT", "UD_English-GUM"]
-        sents = []
-        for treebank in treebanks:
-            conllu_file = common.find_treebank_dataset_file(treebank, udbase_dir, dataset, "conllu", fail=True)
-            sents.extend(read_sentences_from_conllu(conllu_file))
+        conllu_files = [common.find_treebank_dataset_file(treebank, udbase_dir, dataset, "conllu", fail=True)
+                        for treebank in treebanks]
+        sents = itertools.chain.from_iterable(read_sentences_from_conllu(conllu_file) for conllu_file in conllu_files)
     else:
         ewt_conllu = common.find_treebank_dataset_file("UD_English-EWT", udbase_dir, dataset, "conllu")
         sents = read_sentences_from_conllu(ewt_conllu)
 
+    # the MWTs are filtered out as the sentences are streamed through,
+    # so the English data is only read once while writing both outputs
     sents = strip_mwt_from_sentences(sents)
-    write_sentences_to_conllu(output_conllu, sents)
-    convert_conllu_to_txt(output_conllu, output_txt)
+    write_sentences_to_conllu_and_txt(output_conllu, output_txt, sents)
 
     if prepare_labels:
         prepare_dataset_labels(output_txt, output_conllu, tokenizer_dir, short_name, "it", dataset)
@@ -521,6 +590,19 @@ def build_combined_english(udbase_dir, tokenizer_dir, extern_dir, short_name, pr
         build_combined_english_dataset(udbase_dir, tokenizer_dir, extern_dir, short_name, dataset, prepare_labels)
 
 
+def fast_copy(src, dst):
+    """
+    Hardlinks src to dst if possible, such as on the same filesystem, otherwise copies it
+
+    The link shares its data with src, so this must only be used for
+    files which are never modified in place afterwards.
+    """
+    remove_stale_output(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
 def prepare_ud_dataset(treebank, udbase_dir, tokenizer_dir, short_name, short_language, dataset, augment=True, prepare_labels=True):
     # TODO: do this higher up
     os.makedirs(tokenizer_dir, exist_ok=True)
@@ -531,7 +613,13 @@ def prepare_ud_dataset(treebank, udbase_dir, tokenizer_dir, short_name, short_la
     input_conllu = common.find_treebank_dataset_file(treebank, udbase_dir, dataset, "conllu")
     input_conllu_copy = f"{tokenizer_dir}/{short_name}.{dataset}.gold.conllu"
 
+    # preprocess_ssj_data opens its own output files, so clear any
+    # links left from a previous run for it as well
+    for filename in (input_txt_copy, input_conllu_copy):
+        remove_stale_output(filename)
+
     if short_name == "sl_ssj":
+        import stanza.utils.datasets.preprocess_ssj_data as preprocess_ssj_data
         preprocess_ssj_data.process(input_txt, input_conllu, input_txt_copy, input_conllu_copy)
     elif short_name == "te_mtg" and dataset == 'train' and augment:
         write_augmented_dataset(input_conllu, input_conllu_copy, input_txt_copy, augment_telugu)
@@ -543,21 +631,35 @@ def prepare_ud_dataset(treebank, udbase_dir, tokenizer_dir, short_name, short_la
     elif short_name.startswith("ko_") and short_name.endswith("_seg"):
         remove_spaces(input_conllu, input_conllu_copy, input_txt_copy)
     else:
-        shutil.copyfile(input_txt, input_txt_copy)
-        shutil.copyfile(input_conllu, input_conllu_copy)
+        fast_copy(input_txt, input_txt_copy)
+        fast_copy(input_conllu, input_conllu_copy)
 
     if prepare_labels:
         prepare_dataset_labels(input_txt_copy, input_conllu_copy, tokenizer_dir, short_name, short_language, dataset)
 
-def process_ud_treebank(treebank, udbase_dir, tokenizer_dir, short_name, short_language, augment=True, prepare_labels=True):
+def process_ud_treebank(treebank, udbase_dir, tokenizer_dir, short_name, short_language, augment=True, prepare_labels=True, num_processes=1):
     """
     Process a normal UD treebank with train/dev/test splits
 
     SL-SSJ and Vietnamese both use this code path as well.
+
+    The three datasets are independent of each other, so if
+    num_processes > 1, they are prepared in separate processes at the
+    same time.  Otherwise they are prepared one after another in this
+    process.
     """
-    prepare_ud_dataset(treebank, udbase_dir, tokenizer_dir, short_name, short_language, "train", augment, prepare_labels)
-    prepare_ud_dataset(treebank, udbase_dir, tokenizer_dir, short_name, short_language, "dev", augment, prepare_labels)
-    prepare_ud_dataset(treebank, udbase_dir, tokenizer_dir, short_name, short_language, "test", augment, prepare_labels)
+    datasets = ("train", "dev", "test")
+    if num_processes <= 1:
+        for dataset in datasets:
+            prepare_ud_dataset(treebank, udbase_dir, tokenizer_dir, short_name, short_language, dataset, augment, prepare_labels)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(num_processes, len(datasets))) as executor:
+        futures = [executor.submit(prepare_ud_dataset, treebank, udbase_dir, tokenizer_dir, short_name, short_language, dataset, augment, prepare_labels)
+                   for dataset in datasets]
+        for future in futures:
+            # reraises any exception from the worker
+            future.result()
 
 
 XV_RATIO = 0.2
@@ -608,6 +710,8 @@ def add_specific_args(parser):
                         help='Augment the dataset in various ways')
     parser.add_argument('--no_prepare_labels', action='store_false', dest='prepare_labels', default=True,
                         help='Prepare tokenizer and MWT labels.  Expensive, but obviously necessary for training those models.')
+    parser.add_argument('--dataset_processes', type=int, default=1,
+                        help='Prepare up to this many of the train, dev, test sets of a treebank at once, each in its own process.  Default is to prepare them one at a time')
 
 def process_treebank(treebank, paths, args):
     """
@@ -643,7 +747,10 @@ def process_treebank(treebank, paths, args):
         if not common.find_treebank_dataset_file(treebank, udbase_dir, "dev", "txt"):
             process_partial_ud_treebank(treebank, udbase_dir, tokenizer_dir, short_name, short_language, args.prepare_labels)
         else:
-            process_ud_treebank(treebank, udbase_dir, tokenizer_dir, short_name, short_language, args.augment, args.prepare_labels)
+            # other scripts build their own args for process_treebank,
+            # so dataset_processes may not be set
+            num_processes = getattr(args, 'dataset_processes', 1)
+            process_ud_treebank(treebank, udbase_dir, tokenizer_dir, short_name, short_language, args.augment, args.prepare_labels, num_processes)
 
 
 def main():
@@ -0,0 +1,92 @@
+"""
+Tests the python port of conllu_to_text.pl
+
+The expected outputs were produced with the original perl script
+"""
+
+import io
+
+import pytest
+
+from stanza.utils.datasets.conllu_to_text import conllu_to_text
+from tests import *
+
+pytestmark = [pytest.mark.travis, pytest.mark.pipeline]
+
+SENTENCES = [
+    ["# newdoc id = doc1",
+     "# sent_id = 1",
+     "# text = I don't know.",
+     "1\tI\tI\tPRON\tPRP\t_\t3\tnsubj\t_\t_",
+     "2-3\tdon't\t_\t_\t_\t_\t_\t_\t_\t_",
+     "2\tdo\tdo\tAUX\tVBP\t_\t4\taux\t_\t_",
+     "3\tn't\tnot\tPART\tRB\t_\t4\tadvmod\t_\t_",
+     "4\tknow\tknow\tVERB\tVB\t_\t0\troot\t_\tSpaceAfter=No",
+     "5\t.\t.\tPUNCT\t.\t_\t4\tpunct\t_\t_"],
+    ["# sent_id = 2",
+     "# text = Me neither.",
+     "1\tMe\tI\tPRON\tPRP\t_\t0\troot\t_\t_",
+     "2\tneither\tneither\tADV\tRB\t_\t1\tadvmod\t_\tSpaceAfter=No",
+     "3\t.\t.\tPUNCT\t.\t_\t1\tpunct\t_\t_"],
+    ["# newpar",
+     "# sent_id = 3",
+     "# text = Bye",
+     "1\tBye\tbye\tINTJ\tUH\t_\t0\troot\t_\t_"],
+]
+
+def convert(sents):
+    fout = io.StringIO()
+    conllu_to_text(sents, fout)
+    return fout.getvalue()
+
+def test_paragraphs():
+    assert convert(SENTENCES) == "I don't know. Me neither. \n\nBye \n"
+
+def test_line_breaks():
+    sentence = ["%d\tword%d\t_\t_\t_\t_\t_\t_\t_\t_" % (idx + 1, idx) for idx in range(20)]
+    text = convert([sentence])
+    lines = text.split("\n")
+    assert all(len(line) <= 80 for line in lines)
+    assert " ".join(lines).split() == ["word%d" % idx for idx in range(20)]
+
+def word(idx, form, misc="_"):
+    return "%s\t%s\t_\t_\t_\t_\t_\t_\t_\t%s" % (idx, form, misc)
+
+def test_newpar_on_word():
+    """
+    NewPar=Yes on a word in the middle of a sentence ends the paragraph before that word
+    """
+    sents = [["# newdoc", word(1, "One"), word(2, "two", "SpaceAfter=No"), word(3, ":"), word(4, "first", "NewPar=Yes"), word(5, "item")],
+             [word(1, "Next")]]
+    assert convert(sents) == "One two: \n\nfirst item Next \n"
+
+def test_newpar_on_mwt():
+    """
+    For an MWT, NewPar=Yes is on the line introducing the token
+    """
+    sents = [[word(1, "Before"), word("2-3", "del", "NewPar=Yes"), word(2, "de"), word(3, "el"), word(4, "after")]]
+    assert convert(sents) == "Before \n\ndel after \n"
+
+def test_empty_node():
+    sents = [[word(1, "Some"), word(2, "words"), word("2.1", "ghost"), word(3, "here", "SpaceAfter=No"), word(4, ".")]]
+    assert convert(sents) == "Some words here. \n"
+
+def test_mwt_range():
+    """
+    The words inside an MWT range are skipped, and SpaceAfter comes from the MWT line
+    """
+    sents = [[word("1-2", "don't"), word(1, "do"), word(2, "n't"),
+              word("3-4", "vámonos", "SpaceAfter=No"), word(3, "vamos"), word(4, "nos"), word(5, "!")]]
+    assert convert(sents) == "don't vámonos! \n"
+
+def test_long_token():
+    """
+    A token longer than the line limit goes on a line by itself
+    """
+    long_token = "x" * 90
+    sents = [[word(1, "short"), word(2, long_token), word(3, "words"), word(4, "after")],
+             [word(idx + 1, "word%d" % idx) for idx in range(20)]]
+    expected = ("short\n" + long_token + "\n" +
+                "words after word0 word1 word2 word3 word4 word5 word6 word7 word8 word9 word10\n" +
+                "word11 word12 word13 word14 word15 word16 word17 word18 word19 \n")
+    assert convert(sents) == expected
@@ -0,0 +1,92 @@
+"""
+Tests of some of the utility methods in prepare_tokenizer_treebank
+"""
+
+import itertools
+import os
+import re
+import tempfile
+
+import pytest
+
+import stanza.utils.datasets.prepare_tokenizer_treebank as prepare_tokenizer_treebank
+from stanza.utils.datasets.prepare_tokenizer_treebank import MWT_MATCH
+from tests import *
+
+pytestmark = [pytest.mark.travis, pytest.mark.pipeline]
+
+def test_mwt_match():
+    assert MWT_MATCH("3-4\tdon't\t_\t_\t_\t_\t_\t_\t_\t_")
+    assert MWT_MATCH("12-3")
+    assert not MWT_MATCH("3-\t")
+    assert not MWT_MATCH("3.1\t")
+    assert not MWT_MATCH("-3")
+    assert not MWT_MATCH("")
+    assert not MWT_MATCH("3\tdo\t_")
+    assert not MWT_MATCH("# 3-4")
+
+def test_mwt_match_matches_regex():
+    """
+    MWT_MATCH replaced this regex, so check it agrees on every short string of some tricky characters
+    """
+    mwt_re = re.compile("^[0-9]+[-][0-9]+")
+    alphabet = "0 9-.\ta٣"
+    for length in range(6):
+        for chars in itertools.product(alphabet, repeat=length):
+            line = "".join(chars)
+            assert bool(MWT_MATCH(line)) == bool(mwt_re.match(line)), line
+
+def sentence(idx, word):
+    return ["# sent_id = %d" % idx,
+            "# text = %s." % word,
+            "1\t%s\t%s\tNOUN\tNN\t_\t0\troot\t_\tSpaceAfter=No" % (word, word),
+            "2\t.\t.\tPUNCT\t.\t_\t1\tpunct\t_\t_"]
+
+TREEBANK = [sentence(idx, word) for idx, word in enumerate(["Foo", "Bar", "Baz", "Qux", "Quux", "Corge", "Grault", "Garply", "Waldo", "Fred"])]
+
+def read_bytes(filename):
+    with open(filename, "rb") as fin:
+        return fin.read()
+
+def test_write_through_stale_link():
+    """
+    Writing to a path which fast_copy linked to a UD file must not change the UD file
+    """
+    with tempfile.TemporaryDirectory(dir=f'{TEST_WORKING_DIR}/out') as temp_dir:
+        src = os.path.join(temp_dir, "src.conllu")
+        dst = os.path.join(temp_dir, "dst.conllu")
+        prepare_tokenizer_treebank.write_sentences_to_conllu(src, TREEBANK)
+        original = read_bytes(src)
+
+        prepare_tokenizer_treebank.fast_copy(src, dst)
+        assert os.stat(src).st_ino == os.stat(dst).st_ino
+
+        prepare_tokenizer_treebank.write_sentences_to_conllu(dst, TREEBANK[:2])
+        assert read_bytes(src) == original
+        assert os.stat(src).st_ino != os.stat(dst).st_ino
+        assert list(prepare_tokenizer_treebank.read_sentences_from_conllu(dst)) == TREEBANK[:2]
+
+def test_split_train_file_stale_links():
+    """
+    split_train_file writes to the same paths as a full treebank, which may have been linked in a previous run
+    """
+    with tempfile.TemporaryDirectory(dir=f'{TEST_WORKING_DIR}/out') as temp_dir:
+        src = os.path.join(temp_dir, "src.conllu")
+        prepare_tokenizer_treebank.write_sentences_to_conllu(src, TREEBANK)
+        original = read_bytes(src)
+
+        outputs = [os.path.join(temp_dir, x) for x in ("train.conllu", "train.txt", "dev.conllu", "dev.txt")]
+        for output in outputs:
+            prepare_tokenizer_treebank.fast_copy(src, output)
+            assert os.stat(src).st_ino == os.stat(output).st_ino
+
+        prepare_tokenizer_treebank.split_train_file("UD_Test-Test", src, *outputs)
+        assert read_bytes(src) == original
+        for output in outputs:
+            assert os.stat(src).st_ino != os.stat(output).st_ino
+
+        train = list(prepare_tokenizer_treebank.read_sentences_from_conllu(outputs[0]))
+        dev = list(prepare_tokenizer_treebank.read_sentences_from_conllu(outputs[2]))
+        assert len(train) == 8
+        assert len(dev) == 2
+        assert sorted(train + dev) == sorted(TREEBANK)